@@ -0,0 +1,89 @@
+#!/usr/bin/env bash
+# Measure interactive-shell startup.
+#
+# Reports the median wall time of a login shell with the plain and with the
+# compiled init, then the median load time of every component of the compiled
+# init, slowest first, so a plugin that got slower shows up before it ships.
+#
+# Usage: benchmark.sh [runs]
+#
+# With BUVIS_INIT_BUDGET_MS=<ms> it exits 1 when any component's median is
+# over budget.
+set -euo pipefail
+
+runs="${1:-10}"
+budget="${BUVIS_INIT_BUDGET_MS:-}"
+work=$(mktemp -d)
+trap 'rm -rf "$work"' EXIT
+
+now_us() {
+  local t=$EPOCHREALTIME
+  echo "${t/[.,]/}"
+}
+
+# start_shell [env...] — start and exit one login shell, print microseconds
+start_shell() {
+  local t0 t1
+  t0=$(now_us)
+  env "$@" bash -l -i -c exit </dev/null >/dev/null 2>&1
+  t1=$(now_us)
+  echo $((t1 - t0))
+}
+
+# median_ms — median of microsecond values on stdin, in milliseconds
+median_ms() {
+  sort -n | awk '{ v[NR] = $1 } END { printf "%.1f", NR ? v[int((NR + 1) / 2)] / 1000 : 0 }'
+}
+
+# warm the real cache so the compiled runs measure a warm start
+start_shell BUVIS_COMPILED_INIT=1 >/dev/null
+
+for mode in plain compiled; do
+  for ((i = 0; i < runs; i++)); do
+    if [ "$mode" = plain ]; then
+      start_shell BUVIS_COMPILED_INIT=0
+    else
+      start_shell BUVIS_COMPILED_INIT=1
+    fi
+  done >"$work/$mode"
+done
+
+printf 'Shell startup, median of %s runs\n' "$runs"
+printf '  %-10s %8s ms\n' plain "$(median_ms <"$work/plain")"
+printf '  %-10s %8s ms\n' compiled "$(median_ms <"$work/compiled")"
+
+# profiling runs use their own cache dir so the real cache stays unmarked;
+# the first one builds it
+for ((i = 0; i <= runs; i++)); do
+  start_shell BUVIS_COMPILED_INIT=1 \
+    BUVIS_INIT_CACHE_DIR="$work/cache" \
+    BUVIS_INIT_PROFILE="$work/profile.$i" >/dev/null
+done
+rm -f "$work/profile.0"
+
+if ! compgen -G "$work/profile.*" >/dev/null; then
+  echo "No component timings recorded; is the compiled init disabled or failing?" >&2
+  exit 1
+fi
+
+printf '\nComponents, median of %s runs\n' "$runs"
+cat "$work"/profile.* |
+  sort -t $'\t' -k2,2 -k1,1n |
+  awk -F '\t' '
+    function flush() { if (n) printf "%.1f\t%s\n", v[int((n + 1) / 2)] / 1000, name }
+    $2 != name { flush(); name = $2; n = 0 }
+    { v[++n] = $1 }
+    END { flush() }
+  ' |
+  sort -t $'\t' -k1,1nr >"$work/components"
+
+awk -F '\t' '{ printf "  %8.1f ms  %s\n", $1, $2 }' "$work/components"
+
+if [ -n "$budget" ]; then
+  over=$(awk -F '\t' -v b="$budget" '$1 > b' "$work/components")
+  if [ -n "$over" ]; then
+    printf '\nOver the %s ms budget:\n' "$budget" >&2
+    awk -F '\t' '{ printf "  %8.1f ms  %s\n", $1, $2 }' <<<"$over" >&2
+    exit 1
+  fi
+fi
@@ -0,0 +1,246 @@
+#!/usr/bin/env bash
+# Compiled interactive-shell init.
+#
+# Sourced by .bashrc before Bash-it. Instead of forking `mise activate` and
+# `zoxide init` and letting Bash-it glob and source dozens of files on every
+# shell, the generated snippets and every component Bash-it would load are
+# written once into a single cache file, which later shells source directly.
+#
+# The cache is rebuilt only when one of its inputs is newer than the cache:
+# the component files and the directories that list them (enabling a plugin
+# or adding a custom file touches the directory), the tool binaries whose
+# output is cached (an upgrade replaces the binary), mise/config.toml,
+# .bashrc, this script, and bash_it.sh and its reloader, whose runs decide
+# the list. The freshness check uses only bash builtins, so a warm start
+# forks nothing.
+#
+# A rebuild checks that the compiled Bash-it part leaves the same variables,
+# functions and aliases as bash_it.sh. When it does not, say after a Bash-it
+# bump added a statement this script does not copy, the cache loads
+# bash_it.sh itself instead and a warning names the difference.
+#
+# Set BUVIS_COMPILED_INIT=0 to fall back to the plain init path. With
+# BUVIS_INIT_PROFILE=<file> the cache is written with timing marks that append
+# "<microseconds>\t<component>" lines to <file>; benchmark.sh uses that.
+
+: "${BUVIS_INIT_CACHE_DIR:=${XDG_CACHE_HOME:-$HOME/.cache}/buvis}"
+BUVIS_INIT_CACHE="$BUVIS_INIT_CACHE_DIR/bashrc.compiled.bash"
+BUVIS_INIT_INPUTS="$BUVIS_INIT_CACHE_DIR/bashrc.compiled.inputs"
+
+# _buvis_init_tools — print "<name> <binary> <init command>" for every tool
+# whose shell init output is cached. Binaries are resolved on PATH as it is
+# before any of them runs, the same as the plain init path sees it.
+_buvis_init_tools() {
+  local _bin
+  _bin=$(type -P mise) && printf 'mise %s %s\n' "$_bin" "mise activate bash"
+  # zoxide is usually installed by mise, so look for it in mise's install
+  # dirs too when it is not on PATH yet
+  _bin=$(type -P zoxide) ||
+    _bin=$(compgen -G "${MISE_DATA_DIR:-$HOME/.local/share/mise}/installs/cargo-zoxide/*/bin/zoxide" | tail -n 1)
+  [ -n "$_bin" ] && printf 'zoxide %s %s\n' "$_bin" "zoxide init --cmd cd bash"
+  return 0
+}
+
+# _buvis_init_components — print the files Bash-it sources, in the order it
+# sources them. Rather than mirroring bash_it.sh, which changes with every
+# Bash-it bump, this loads Bash-it once in a subshell with `source` and `.`
+# wrapped, and prints every file sourced by bash_it.sh itself or by the
+# reloader it uses for the enabled components. Files those source in turn
+# (appearance.bash loading the theme, say) stay nested, the same as in a plain
+# start. Fails when the trace does not look like a Bash-it start, so the
+# caller can fall back to bash_it.sh itself.
+_buvis_init_components() {
+  local _components
+  [ -f "$BASH_IT/bash_it.sh" ] || return 1
+  _components=$(
+    (
+      # declares in the traced files turn into locals of these wrappers, which
+      # is harmless here: only the list of files is kept
+      _buvis_init_trace() {
+        case "$1" in
+        */bash_it.sh | */scripts/reloader.bash)
+          [[ "$2" == */scripts/reloader.bash ]] || printf '%s\n' "$2" >&3
+          ;;
+        esac
+        shift
+        builtin source "$@"
+      }
+      source() { _buvis_init_trace "${BASH_SOURCE[1]}" "$@"; }
+      .() { _buvis_init_trace "${BASH_SOURCE[1]}" "$@"; }
+      builtin source "$BASH_IT/bash_it.sh"
+    ) 3>&1 >/dev/null 2>&1 </dev/null
+  )
+  # _buvis_init_write_bash_it relies on composure coming first
+  [[ "$_components" == "$BASH_IT/vendor/github.com/erichs/composure/composure.sh"$'\n'* ]] || return 1
+  printf '%s\n' "$_components"
+}
+
+# _buvis_init_write_tools — print the cached init output of the tools
+_buvis_init_write_tools() {
+  local _name _bin _cmd
+  printf '# Generated by %s on %s, do not edit.\n' "${BASH_SOURCE[0]}" "$(date '+%Y-%m-%d %H:%M:%S')"
+  [ -n "${BUVIS_INIT_PROFILE:-}" ] && printf '_buvis_init_t=$EPOCHREALTIME\n'
+  while read -r _name _bin _cmd; do
+    printf '\n# --- %s\n' "$_cmd"
+    # shellcheck disable=SC2086
+    "$_bin" ${_cmd#* } </dev/null || return 1
+    _buvis_init_write_mark "$_cmd"
+  done < <(_buvis_init_tools)
+}
+
+# _buvis_init_write_bash_it <components> — print the components with the
+# statements bash_it.sh runs between and after its `source` calls
+_buvis_init_write_bash_it() {
+  local _f
+  printf '\n# --- bash-it\n'
+  cat <<'EOF'
+BASH_IT_LOG_PREFIX="core: main: "
+: "${BASH_IT_CUSTOM:=${BASH_IT}/custom}"
+: "${CUSTOM_THEME_DIR:="${BASH_IT_CUSTOM}/themes"}"
+# the outermost sourced file, .bashrc, the same as bash_it.sh finds it
+: "${BASH_IT_BASHRC:=${BASH_SOURCE[${#BASH_SOURCE[@]} - 1]}}"
+_bash_it_library_finalize_hook=()
+EOF
+  grep -q '^APPEARANCE_LIB=' "$BASH_IT/bash_it.sh" &&
+    printf '%s\n' 'APPEARANCE_LIB="${BASH_IT}/lib/appearance.bash"'
+  while read -r _f; do
+    printf '\n# --- %s\n' "$_f"
+    cat "$_f" || return 1
+    # bash_it.sh cites the metadata keywords right after loading composure
+    if [ "$_f" = "$BASH_IT/vendor/github.com/erichs/composure/composure.sh" ]; then
+      printf '\ncite _about _param _example _group _author _version\n'
+      printf 'cite about-alias about-plugin about-completion\n'
+    fi
+    case "$_f" in
+    "$BASH_IT_CUSTOM"/*) _buvis_init_write_mark "custom/${_f#"$BASH_IT_CUSTOM"/}" ;;
+    *) _buvis_init_write_mark "bash-it/${_f#"$BASH_IT"/}" ;;
+    esac
+  done <<<"$1"
+
+  printf '\n# --- bash-it finalize\n'
+  cat <<'EOF'
+if [[ -n "${PROMPT:-}" ]]; then
+  PS1="${PROMPT}"
+fi
+if _command_exists gloobus-preview; then
+  PREVIEW="gloobus-preview"
+elif [[ -d /Applications/Preview.app ]]; then
+  PREVIEW="/Applications/Preview.app"
+else
+  PREVIEW="less"
+fi
+if [[ -n "${BASH_IT_RELOAD_LEGACY:-}" ]] && ! _command_exists reload; then
+  # shellcheck disable=SC2139
+  alias reload="builtin source '${BASH_IT_BASHRC?}'"
+fi
+for _bash_it_library_finalize_f in "${_bash_it_library_finalize_hook[@]:-}"; do
+  eval "${_bash_it_library_finalize_f?}"
+done
+unset "${!_bash_it_library_finalize_@}" "${!_bash_it_main_file_@}"
+set +T
+EOF
+  _buvis_init_write_mark "bash-it finalize"
+}
+
+# _buvis_init_state — print the names of the shell's variables and functions
+# and its aliases, leaving out this script's own
+_buvis_init_state() {
+  { compgen -v && compgen -A function && alias -p; } | grep -v '^_buvis_init' | LC_ALL=C sort
+}
+
+# _buvis_init_verify <file> — true when sourcing <file> leaves the same
+# variables, functions and aliases as sourcing bash_it.sh; warns otherwise
+_buvis_init_verify() {
+  # named like this script's own, so the states leave them out
+  local _buvis_init_plain _buvis_init_compiled
+  _buvis_init_plain=$(_buvis_init_state_after "$BASH_IT/bash_it.sh")
+  _buvis_init_compiled=$(_buvis_init_state_after "$1")
+  [ -n "$_buvis_init_plain" ] && [ "$_buvis_init_plain" = "$_buvis_init_compiled" ] && return 0
+  {
+    echo "compile.sh: the compiled Bash-it init differs from bash_it.sh, which is loaded as is instead:"
+    diff <(echo "$_buvis_init_plain") <(echo "$_buvis_init_compiled") | grep '^[<>]' | head -n 10
+  } >&2
+  return 1
+}
+
+# _buvis_init_state_after <file> — print _buvis_init_state after sourcing
+# <file> in a subshell
+_buvis_init_state_after() {
+  (
+    unset BUVIS_INIT_PROFILE
+    builtin source "$1" && _buvis_init_state >&3
+  ) 3>&1 >/dev/null 2>&1 </dev/null
+}
+
+# _buvis_init_write_mark <component> — in profiling mode, print the line that
+# records how long <component> took to load
+_buvis_init_write_mark() {
+  [ -n "${BUVIS_INIT_PROFILE:-}" ] && printf '_buvis_init_mark %q\n' "$1"
+  return 0
+}
+
+# _buvis_init_mark <component> — append the time since the previous mark
+_buvis_init_mark() {
+  local _now=$EPOCHREALTIME
+  printf '%s\t%s\n' "$((${_now/[.,]/} - ${_buvis_init_t/[.,]/}))" "$1" >>"$BUVIS_INIT_PROFILE"
+  _buvis_init_t=$EPOCHREALTIME
+}
+
+# _buvis_init_compile — regenerate the cache and its inputs list
+_buvis_init_compile() {
+  local _tmp _f _components
+  _components=$(_buvis_init_components) || return 1
+  mkdir -p "$BUVIS_INIT_CACHE_DIR" || return 1
+  _tmp=$(mktemp "$BUVIS_INIT_CACHE.XXXXXX") || return 1
+  if ! _buvis_init_write_bash_it "$_components" >"$_tmp.bash-it" ||
+    ! _buvis_init_verify "$_tmp.bash-it"; then
+    printf '\n# --- bash-it\nsource "$BASH_IT/bash_it.sh"\n' >"$_tmp.bash-it"
+  fi
+  if ! { _buvis_init_write_tools && cat "$_tmp.bash-it"; } >"$_tmp"; then
+    rm -f "$_tmp" "$_tmp.bash-it"
+    return 1
+  fi
+  rm -f "$_tmp.bash-it"
+
+  {
+    for _f in "${DOTFILES_ROOT:-$HOME}/.bashrc" "${BASH_SOURCE[0]}" \
+      "${XDG_CONFIG_HOME:-$HOME/.config}/mise/config.toml" \
+      "$BASH_IT/bash_it.sh" "$BASH_IT/scripts/reloader.bash" \
+      "$BASH_IT/enabled" "$BASH_IT_CUSTOM" "$BASH_IT_CUSTOM"/*/; do
+      [ -e "$_f" ] && printf '%s\n' "$_f"
+    done
+    # parent dirs catch added or removed components
+    sed 's|/[^/]*$||' <<<"$_components" | sort -u
+    _buvis_init_tools | cut -d ' ' -f 2
+    printf '%s\n' "$_components"
+  } >"$BUVIS_INIT_INPUTS"
+
+  mv -f "$_tmp" "$BUVIS_INIT_CACHE"
+}
+
+# _buvis_init_fresh — true when the cache exists and no input is newer
+_buvis_init_fresh() {
+  local _inputs _f
+  [ -s "$BUVIS_INIT_CACHE" ] && [ -s "$BUVIS_INIT_INPUTS" ] || return 1
+  mapfile -t _inputs <"$BUVIS_INIT_INPUTS"
+  for _f in "${_inputs[@]}"; do
+    # a vanished input (uninstalled tool, removed plugin) also invalidates
+    [ -e "$_f" ] || return 1
+    [ "$_f" -nt "$BUVIS_INIT_CACHE" ] && return 1
+  done
+  return 0
+}
+
+# _buvis_init_ready — make sure the cache is fresh, rebuilding it if stale.
+# The caller sources $BUVIS_INIT_CACHE itself: sourcing it from inside a
+# function would turn every `declare` in the components into a local. Fails
+# when the cache cannot be built, so the caller can run the plain init path.
+_buvis_init_ready() {
+  _buvis_init_fresh || _buvis_init_compile
+}
+
+# buvis-init-rebuild — force a rebuild of the compiled init
+buvis-init-rebuild() {
+  rm -f "$BUVIS_INIT_CACHE" "$BUVIS_INIT_INPUTS"
+  _buvis_init_compile && echo "Rebuilt $BUVIS_INIT_CACHE"
+}
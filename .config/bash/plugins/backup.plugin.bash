@@ -1,37 +1,127 @@
 cite about-plugin
 about-plugin 'functions for backing stuff up'
 
+# backup-host <host> [list] [dest] — pull the files named in <list> (default
+# .config/backup/<host>.list) from <host> into <dest>, mirroring their paths.
+# Everything goes over one SSH connection: one round trip checksums the whole
+# list on the host, one tar stream pulls just the files whose checksum differs
+# from the manifest of the last run. Versions replaced or removed by a run are
+# kept in <dest>/.versions/<timestamp>/ along with a CHANGES report.
+function backup-host () {
+    local host="$1"
+    local list="${2:-${DOTFILES_ROOT}/.config/backup/${host}.list}"
+    local dest="${3:-${DOTFILES_ROOT}/Downloads/backup/${host}}"
+    local socket paths status
+    if [ -z "$host" ]; then
+        echo "Usage: backup-host <host> [list] [dest]" >&2
+        return 2
+    fi
+    if [ ! -f "$list" ]; then
+        echo "No file list for $host: $list" >&2
+        return 1
+    fi
+    mapfile -t paths < <(sed -e 's/#.*//' -e 's/[[:space:]]*$//' -e '/^$/d' "$list")
+    mkdir -p "$dest" || return
+
+    socket=$(mktemp -u "${TMPDIR:-/tmp}/backup-ssh.XXXXXX")
+    ssh -fNM -S "$socket" "$host" || return
+    _backup_pull "$host" "$socket" "$dest" "${paths[@]}"
+    status=$?
+    ssh -S "$socket" -O exit "$host" 2>/dev/null
+    return $status
+}
+
 # backup router configuration
 function backup-router () {
-    mkdir -p "${DOTFILES_ROOT}/Downloads/router-backup"
-    cd "${DOTFILES_ROOT}/Downloads/router-backup" || return
-    mkdir -p etc
-    mkdir -p etc/mail
-    mkdir -p etc/protonvpn
-    mkdir -p etc/ssh
-    mkdir -p home/bob
-    mkdir -p var/unbound/etc
-    mkdir -p usr/local/bin
-    scp orcus.buvis.net:/etc/bgpd.conf etc/bgpd.conf
-    scp orcus.buvis.net:/etc/dhclient.conf etc/dhclient.conf
-    scp orcus.buvis.net:/etc/dhcpd.conf etc/dhcpd.conf
-    scp orcus.buvis.net:/etc/dnscrypt-proxy-buvis.toml etc/dnscrypt-proxy-buvis.toml
-    scp orcus.buvis.net:/etc/dnscrypt-proxy.toml etc/dnscrypt-proxy.toml
-    scp orcus.buvis.net:/etc/hostname.em0 etc/hostname.em0
-    scp orcus.buvis.net:/etc/hostname.em1 etc/hostname.em1
-    scp orcus.buvis.net:/etc/hostname.em2 etc/hostname.em2
-    scp orcus.buvis.net:/etc/hostname.bridge0 etc/hostname.bridge0
-    scp orcus.buvis.net:/etc/hosts etc/hosts
-    scp orcus.buvis.net:/etc/mail/smtpd.conf etc/mail/smtpd.conf
-    scp orcus.buvis.net:/etc/newsyslog.conf etc/newsyslog.conf
-    scp orcus.buvis.net:/etc/pf.conf etc/pf.conf
-    scp -r orcus.buvis.net:/etc/protonvpn/ etc/protonvpn/
-    scp orcus.buvis.net:/etc/rc.conf.local etc/rc.conf.local
-    scp orcus.buvis.net:/etc/resolv.conf.tail etc/resolv.conf.tail
-    scp orcus.buvis.net:/etc/ssh/sshd_config etc/ssh/sshd_config
-    scp orcus.buvis.net:/etc/sysctl.conf etc/ssh/sysctl.conf
-    scp orcus.buvis.net:/home/bob/send-vim-tip.sh home/bob/send-vim-tip.sh
-    scp orcus.buvis.net:/usr/local/bin/reload_abusers.sh usr/local/bin/reload_abusers.sh
-    scp -r orcus.buvis.net:/var/unbound/etc/ var/unbound/
-    cd - || return
+    backup-host orcus.buvis.net "" "${DOTFILES_ROOT}/Downloads/router-backup"
+}
+
+# _backup_quote <words...> — print the words single-quoted for a remote sh
+function _backup_quote () {
+    local word
+    for word in "$@"; do
+        printf "'%s' " "${word//\'/\'\\\'\'}"
+    done
+}
+
+# _backup_pull <host> <socket> <dest> <paths...> — sync <dest> with <paths>
+# on <host> over the master connection at <socket>
+function _backup_pull () {
+    local host="$1" socket="$2" dest="$3"
+    shift 3
+    local manifest="$dest/.manifest" stamp work versions flag path
+    local -a fetch=()
+    stamp=$(date '+%Y%m%d-%H%M%S')
+    versions="$dest/.versions/$stamp"
+    work=$(mktemp -d) || return
+    touch "$manifest"
+
+    # <sha256>\t<path> of every file under <paths>; sha256sum on Linux,
+    # sha256 -r on the BSDs. A missing path is reported by find and skipped.
+    ssh -S "$socket" "$host" "
+        if command -v sha256sum >/dev/null 2>&1; then set -- sha256sum; else set -- sha256 -r; fi
+        find $(_backup_quote "$@") -type f -exec \"\$@\" {} +
+        exit 0" >"$work/remote" || {
+        rm -rf "$work"
+        return 1
+    }
+    awk '{ sum = $1; sub(/^[^ ]+ +\*?/, ""); print sum "\t" $0 }' "$work/remote" |
+        LC_ALL=C sort -t $'\t' -k 2 >"$work/manifest"
+    (cd "$dest" && find . -path ./.versions -prune -o -type f -print) | cut -c 2- >"$work/local"
+
+    # A added, M modified, D removed on the host; R restores a file that is
+    # gone from <dest> although the host did not change it
+    awk -F '\t' '
+        FILENAME == ARGV[1] { old[$2] = $1; next }
+        FILENAME == ARGV[2] { here[$0] = 1; next }
+        {
+            if (!($2 in old)) print "A\t" $2
+            else if (old[$2] != $1) print "M\t" $2
+            else if (!($2 in here)) print "R\t" $2
+            delete old[$2]
+        }
+        END { for (p in old) print "D\t" p }
+    ' "$manifest" "$work/local" "$work/manifest" | LC_ALL=C sort -t $'\t' -k 2 >"$work/changes"
+
+    if [ ! -s "$work/changes" ]; then
+        echo "$host: no changes in $(wc -l <"$work/manifest" | tr -d ' ') files"
+        mv -f "$work/manifest" "$manifest"
+        rm -rf "$work"
+        return 0
+    fi
+
+    while IFS=$'\t' read -r flag path; do
+        [ "$flag" = D ] || fetch+=("${path#/}")
+    done <"$work/changes"
+    mkdir -p "$work/new"
+    if [ ${#fetch[@]} -gt 0 ] && ! {
+        ssh -S "$socket" "$host" "cd / && tar cf - $(_backup_quote "${fetch[@]}")" >"$work/pull.tar" &&
+            tar xf "$work/pull.tar" -C "$work/new"
+    }; then
+        echo "$host: transfer failed, nothing updated" >&2
+        rm -rf "$work"
+        return 1
+    fi
+
+    # keep the versions this run replaces or removes, then put the new ones in
+    while IFS=$'\t' read -r flag path; do
+        case "$flag" in
+        M | D)
+            [ -f "$dest$path" ] || continue
+            mkdir -p "$versions${path%/*}"
+            mv "$dest$path" "$versions$path"
+            ;;
+        esac
+    done <"$work/changes"
+    cp -pR "$work/new/." "$dest/"
+    mv -f "$work/manifest" "$manifest"
+
+    mkdir -p "$versions"
+    awk -F '\t' '{ n[$1]++ } END {
+        printf "%d added, %d modified, %d removed, %d restored\n", n["A"], n["M"], n["D"], n["R"]
+    }' "$work/changes" >"$versions/CHANGES"
+    tr '\t' ' ' <"$work/changes" >>"$versions/CHANGES"
+    echo "$host: $(head -n 1 "$versions/CHANGES") since the last snapshot"
+    tail -n +2 "$versions/CHANGES" | sed 's/^/  /'
+    rm -rf "$work"
 }
@@ -6,19 +6,27 @@ about-plugin 'functions for software development'
 #   SHELL=/bin/sh GIT_PAGER=cat command claude --plugin-dir ~/.config/claude/ "$@"
 # }
 
-# _autopilot_tagged <pid> — true when <pid> or a direct child of it carries
-# _AUTOPILOT_LOOP=<pid> in its ps environment. Children count because ps
-# reports the EXEC-time environment: _autoclaude_tracon forks the loop shell
-# (the pid the registry stores — killpg needs the group leader) and the tag is
-# exported only after that fork, so it shows on the exec'd driver beneath the
-# shell and never on the shell itself. Matching the shell alone swept LIVE
-# loops out of the registry, and tracon then read them as dead: no pause chip,
-# no limit-wait countdown, and q → s answering "nothing to stop".
-_autopilot_tagged() {
-  local _pid="$1" _kids
-  _kids=$(pgrep -P "$_pid" 2>/dev/null | tr '\n' ',')
-  ps ewww -p "$_pid${_kids:+,${_kids%,}}" -o command= 2>/dev/null |
-    grep -qE "_AUTOPILOT_LOOP=${_pid}( |$)"
+# _autopilot_tagged_pids — print, one per line, every pid <pid> for which
+# <pid> or a direct child of it carries _AUTOPILOT_LOOP=<pid> in its ps
+# environment. Children count because ps reports the EXEC-time environment:
+# _autoclaude_tracon forks the loop shell (the pid the registry stores —
+# killpg needs the group leader) and the tag is exported only after that
+# fork, so it shows on the exec'd driver beneath the shell and never on the
+# shell itself. Matching the shell alone swept LIVE loops out of the
+# registry, and tracon then read them as dead: no pause chip, no limit-wait
+# countdown, and q → s answering "nothing to stop". One ps snapshot covers
+# every registry entry, instead of a pgrep and a ps per entry.
+_autopilot_tagged_pids() {
+  ps axewww -o pid=,ppid=,command= 2>/dev/null |
+    awk '{
+      rest = $0
+      while (match(rest, /_AUTOPILOT_LOOP=[0-9]+( |$)/)) {
+        tag = substr(rest, RSTART + 16, RLENGTH - 16)
+        sub(/ $/, "", tag)
+        if (tag == $1 || tag == $2) print tag
+        rest = substr(rest, RSTART + RLENGTH)
+      }
+    }' | sort -u
 }
 
 # _autopilot_prune_registry <loops_dir> — sweep <loops_dir>/*.json for stale
@@ -30,14 +38,30 @@ _autopilot_tagged() {
 # can never denote a live loop either. Never touches the CURRENT process's
 # own entry (stored pid == $BASHPID, whatever the entry's filename) — this
 # process is definitionally alive and is never its own stale duplicate.
+# Single pass: one jq over all entries and one ps snapshot, so the cost does
+# not grow with the number of registered loops.
 _autopilot_prune_registry() {
-  local _dir="$1" _f _pid
+  local _dir="$1" _f _pid _tagged
+  local -A _pids=()
+  compgen -G "$_dir/*.json" >/dev/null || return 0
+
+  # jq stops at the first malformed file; entries it never reached are read
+  # one by one below
+  while IFS=$'\t' read -r _f _pid; do
+    _pids["$_f"]="$_pid"
+  done < <(jq -r '[input_filename, (.pid // "" | tostring)] | @tsv' "$_dir"/*.json 2>/dev/null)
+  _tagged=" $(_autopilot_tagged_pids | tr '\n' ' ')"
+
   for _f in "$_dir"/*.json; do
     [ -e "$_f" ] || continue
-    _pid=$(jq -r '.pid // empty' "$_f" 2>/dev/null)
+    if [ -n "${_pids["$_f"]+set}" ]; then
+      _pid="${_pids["$_f"]}"
+    else
+      _pid=$(jq -r '.pid // empty' "$_f" 2>/dev/null)
+    fi
     [ "$_pid" = "$BASHPID" ] && continue
     if [ -z "$_pid" ] || ! kill -0 "$_pid" 2>/dev/null ||
-      ! _autopilot_tagged "$_pid"; then
+      [[ "$_tagged" != *" $_pid "* ]]; then
       rm -f "$_f"
     fi
   done
@@ -87,7 +111,7 @@ _autoclaude_tracon() {
   fi
 
   # (2) Dependency preflight. Failure => today's renderer, zero behavior change.
-  if ! uv run --quiet --no-project "$_tracon_py" --preflight >/dev/null 2>&1; then
+  if ! _autoclaude_tracon_preflight "$_tracon_py"; then
     printf 'autoclaude: tracon unavailable (uv/textual preflight failed); using the plain renderer.\n' >&2
     _AUTOPILOT_TRACON=0 autoclaude "$@"
     return $?
@@ -168,6 +192,21 @@ _autoclaude_tracon() {
   return "$_crc"
 }
 
+# _autoclaude_tracon_preflight <tracon_py> — run tracon's uv/textual
+# preflight, remembering a pass in a stamp file: a passed preflight stays
+# valid until tracon.py or uv itself changes, so a warm start skips a whole
+# uv process. A failed preflight is never cached.
+_autoclaude_tracon_preflight() {
+  local _stamp="${XDG_CACHE_HOME:-$HOME/.cache}/buvis/tracon-preflight" _uv
+  _uv=$(type -P uv) || return 1
+  if [ -f "$_stamp" ] && [ -f "$1" ] && [ ! "$1" -nt "$_stamp" ] && [ ! "$_uv" -nt "$_stamp" ]; then
+    return 0
+  fi
+  rm -f "$_stamp"
+  uv run --quiet --no-project "$1" --preflight >/dev/null 2>&1 || return 1
+  mkdir -p "${_stamp%/*}" && touch "$_stamp"
+}
+
 # SIGINT to the child's process GROUP. No pid-directed fallback: a pid-directed
 # INT is DEFERRED by bash until the child's foreground pipeline ends (measured)
 # — that is the known-bad path and must never be added.
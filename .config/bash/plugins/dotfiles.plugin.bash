@@ -6,10 +6,119 @@ alias cfga="cfg add"
 alias cfgapa="cfga -p"
 alias cfgm="cfg commit -m"
 alias cfgp="cfg push"
+alias cfgl="dotfiles-pull"
 if [[ $(command -v git-secret) ]]; then
-  alias cfgl="cfg pull && cfg submodule foreach git reset --hard && cfg submodule update --init && cfg submodule update --remote --merge; cfg secret reveal -f;"
   alias cfgs="cfg secret hide -m; cfg status"
 else
-  alias cfgl="cfg pull && cfg submodule foreach git reset --hard && cfg submodule update --init && cfg submodule update --remote --merge;"
   alias cfgs="cfg status"
 fi
+
+# the cfg alias, for functions: aliases defined in the same file are not
+# expanded in them
+function _dotfiles_git() {
+  git --git-dir="$DOTFILES_ROOT/.buvis/" --work-tree="$DOTFILES_ROOT" "$@"
+}
+
+# dotfiles-pull [--full] — pull the dotfiles and bring submodules and secrets
+# up to date where the pull changed them. Submodules are reset and updated
+# only when their pinned SHAs or .gitmodules moved, or a checkout is missing.
+# Secrets are decrypted only when their hash in mapping.cfg differs from the
+# one they were last revealed at, or the file is missing, and those run in
+# parallel. --full resets and updates every submodule, floats them to their
+# remote tips and reveals every secret.
+function dotfiles-pull() {
+  local _before _full=
+  [ "${1:-}" = --full ] && _full=1
+  _before=$(_dotfiles_git rev-parse -q --verify HEAD)
+  if _dotfiles_git pull; then
+    if [ -n "$_full" ] || _dotfiles_submodules_moved "$_before"; then
+      _dotfiles_git submodule foreach git reset --hard && _dotfiles_git submodule update --init
+    fi
+    [ -n "$_full" ] && _dotfiles_git submodule update --remote --merge
+  fi
+  if [[ $(command -v git-secret) ]]; then
+    _dotfiles_reveal ${_full:+--full}
+  fi
+}
+
+# _dotfiles_submodules_moved <old HEAD> — true when a submodule checkout is
+# missing or the commits since <old HEAD> touch a gitlink or .gitmodules
+function _dotfiles_submodules_moved() {
+  local _key _value
+  [ -f "$DOTFILES_ROOT/.gitmodules" ] || return 1
+  while read -r _key _ _value; do
+    [ "$_key" = path ] && [ ! -e "$DOTFILES_ROOT/$_value/.git" ] && return 0
+  done <"$DOTFILES_ROOT/.gitmodules"
+  [ -n "$1" ] || return 0
+  [ "$1" = "$(_dotfiles_git rev-parse HEAD)" ] && return 1
+  _dotfiles_git diff --raw --no-renames "$1" HEAD |
+    awk '$1 == ":160000" || $2 == "160000" || $NF == ".gitmodules" { found = 1 } END { exit !found }'
+}
+
+# _dotfiles_reveal [--full] — decrypt the secrets whose mapping.cfg hash
+# changed since they were last revealed. The revealed hashes are cached in
+# ~/.cache/buvis/secrets-revealed; a secret the cache does not know yet is
+# hashed and decrypted only if it differs from mapping.cfg.
+function _dotfiles_reveal() {
+  local _mapping="$DOTFILES_ROOT/.gitsecret/paths/mapping.cfg"
+  local _cache="${XDG_CACHE_HOME:-$HOME/.cache}/buvis/secrets-revealed"
+  local _line _path _hash
+  local -a _order=() _unknown=() _stale=()
+  local -A _want=() _cached=() _done=()
+  [ -f "$_mapping" ] || return 0
+  if [ "${1:-}" != --full ] && [ -f "$_cache" ]; then
+    while IFS= read -r _line; do
+      _cached[${_line%:*}]=${_line##*:}
+    done <"$_cache"
+  fi
+
+  while IFS= read -r _line; do
+    [ -n "$_line" ] || continue
+    # entries written by old git-secret versions carry no hash
+    if [[ $_line != *:* ]]; then
+      _path=$_line _hash=
+    else
+      _path=${_line%:*} _hash=${_line##*:}
+    fi
+    _order+=("$_path")
+    _want[$_path]=$_hash
+    if [ -z "$_hash" ] || [ ! -e "$DOTFILES_ROOT/$_path" ]; then
+      _stale+=("$_path")
+    elif [ "${_cached[$_path]:-}" = "$_hash" ]; then
+      _done[$_path]=1
+    elif [ "${1:-}" != --full ] && [ -z "${_cached[$_path]+set}" ]; then
+      _unknown+=("$_path")
+    else
+      _stale+=("$_path")
+    fi
+  done <"$_mapping"
+
+  if [ ${#_unknown[@]} -gt 0 ]; then
+    while read -r _hash _path; do
+      if [ "$_hash" = "${_want[$_path]}" ]; then
+        _done[$_path]=1
+      else
+        _stale+=("$_path")
+      fi
+    done < <(cd "$DOTFILES_ROOT" && { sha256sum -- "${_unknown[@]}" 2>/dev/null || shasum -a 256 -- "${_unknown[@]}"; })
+  fi
+
+  if [ ${#_stale[@]} -gt 0 ]; then
+    while IFS= read -r _path; do
+      _done[$_path]=1
+    done < <(
+      cd "$DOTFILES_ROOT" &&
+        printf '%s\0' "${_stale[@]}" |
+        xargs -0 -n 1 -P "$(nproc 2>/dev/null || sysctl -n hw.ncpu 2>/dev/null || echo 4)" \
+          sh -c 'git --git-dir="$1/.buvis/" --work-tree="$1" secret reveal -f "$2" >&2 && printf "%s\n" "$2"' _ "$DOTFILES_ROOT"
+    )
+    [ "${#_done[@]}" -lt "${#_order[@]}" ] && echo "Some secrets could not be revealed, see above" >&2
+  fi
+
+  mkdir -p "${_cache%/*}"
+  for _path in "${_order[@]}"; do
+    if [ -n "${_done[$_path]:-}" ] && [ -n "${_want[$_path]}" ]; then
+      printf '%s:%s\n' "$_path" "${_want[$_path]}"
+    fi
+  done >"$_cache.$$" && mv -f "$_cache.$$" "$_cache"
+}
@@ -15,6 +15,11 @@ function mopidy-make () {
     echo "Get the OAuth link from the logs: ssh $1 docker logs mopidy"
 }
 
+# scan only changes in local library
+function mopidy-rescan-changes () {
+    ssh "$1" "sudo /usr/local/bin/mopidy-scan-changes ${2:-}"
+}
+
 # scan local library
 function mopidy-rescan () {
     case "$1" in
@@ -1,6 +1,96 @@
 cite about-plugin
 about-plugin 'useful tools for photographers'
 
+# Batch engine shared by the metadata functions below. Starting exiftool costs
+# far more than the metadata work on one file, so every worker keeps a single
+# exiftool running (-stay_open) and feeds it one command per file, tags are
+# read for all files in one bulk pass, and files are spread across
+# PHOTO_JOBS workers (default: number of CPU cores).
+
+# number of parallel workers
+function _photo_jobs() {
+  echo "${PHOTO_JOBS:-$(nproc 2>/dev/null || sysctl -n hw.ncpu 2>/dev/null || echo 4)}"
+}
+
+# start a long-lived exiftool for this shell, replacing a stale one
+function _photo_exiftool_start() {
+  _photo_exiftool_stop
+  coproc _PHOTO_EXIFTOOL { exiftool -stay_open True -@ - 2>&1; }
+}
+
+# _photo_exiftool_run <arg>... — run one exiftool command in the long-lived
+# process; its output is left in _PHOTO_EXIFTOOL_OUTPUT
+function _photo_exiftool_run() {
+  local line
+  _PHOTO_EXIFTOOL_OUTPUT=""
+  printf '%s\n' "$@" -execute >&"${_PHOTO_EXIFTOOL[1]}" || return 1
+  while IFS= read -r line <&"${_PHOTO_EXIFTOOL[0]}"; do
+    [ "$line" = "{ready}" ] && return 0
+    _PHOTO_EXIFTOOL_OUTPUT+="$line"$'\n'
+  done
+  return 1
+}
+
+# _photo_exiftool_write <arg>... — like _photo_exiftool_run, but succeeds only
+# when exiftool reports the file as updated
+function _photo_exiftool_write() {
+  _photo_exiftool_run "$@" || return 1
+  [[ "$_PHOTO_EXIFTOOL_OUTPUT" == *"1 image files updated"* ]]
+}
+
+function _photo_exiftool_stop() {
+  [ -n "${_PHOTO_EXIFTOOL_PID:-}" ] || return 0
+  printf '%s\n' -stay_open False >&"${_PHOTO_EXIFTOOL[1]}" 2>/dev/null
+  wait "$_PHOTO_EXIFTOOL_PID" 2>/dev/null
+  unset _PHOTO_EXIFTOOL_PID
+}
+
+# _photo_read_tags <list> <date format> <tag>... — print "<file>\t<tag>\t..."
+# for every file named in <list> in a single exiftool run; missing tags print
+# as "-" and an empty <date format> keeps exiftool's default. The file is
+# printed the way it was named in <list>, minus a leading "./".
+function _photo_read_tags() {
+  local list="$1" date_format="$2" format='$Directory/$FileName' tag
+  shift 2
+  for tag in "$@"; do
+    format+=$'\t$'"$tag"
+  done
+  exiftool -q -q -f -m ${date_format:+-d "$date_format"} -p "$format" -@ "$list" 2>/dev/null |
+    sed 's|^\./||'
+}
+
+# _photo_batch_run <worker> <list> — split the lines of <list> across
+# $(_photo_jobs) background workers, each running `<worker> <chunk>`; a worker
+# writes its failure count to <chunk>.failed. Sets _PHOTO_BATCH_FAILED to the
+# total.
+function _photo_batch_run() {
+  local worker="$1" list="$2" jobs chunk chunks failed
+  jobs="$(_photo_jobs)"
+  awk -v n="$jobs" -v prefix="$list.chunk" '{ print > (prefix (NR - 1) % n) }' "$list"
+  chunks=("$list".chunk*)
+  # in a subshell, so an interactive shell prints no job notices
+  (
+    for chunk in "${chunks[@]}"; do
+      "$worker" "$chunk" &
+    done
+    wait
+  )
+  _PHOTO_BATCH_FAILED=0
+  for chunk in "${chunks[@]}"; do
+    read -r failed <"$chunk.failed" 2>/dev/null || failed=$(wc -l <"$chunk")
+    _PHOTO_BATCH_FAILED=$((_PHOTO_BATCH_FAILED + failed))
+    rm -f "$chunk" "$chunk.failed"
+  done
+}
+
+# _photo_report_throughput <files> <start EPOCHREALTIME>
+function _photo_report_throughput() {
+  awk -v n="$1" -v t0="${2/,/.}" -v t1="${EPOCHREALTIME/,/.}" 'BEGIN {
+    t = t1 - t0
+    printf "Processed %d files in %.1fs (%.1f files/s)\n", n, t, (t > 0 ? n / t : n)
+  }'
+}
+
 # use SetFile and exiftool to set the file creation date from EXIF metadata
 # requires: xcode-select and exiftool
 function fix_date_from_exif() {
@@ -9,7 +99,9 @@ function fix_date_from_exif() {
     return 1
   fi
 
-  local f d failed=0
+  local f d created failed=0 start="$EPOCHREALTIME" list
+  local -A dates=() creation_dates=()
+  local files=()
 
   for f in "$@"; do
     if [ ! -f "$f" ]; then
@@ -17,28 +109,64 @@ function fix_date_from_exif() {
       ((failed++))
       continue
     fi
+    files+=("$f")
+  done
+  [ ${#files[@]} -eq 0 ] && return 1
+
+  # one bulk read for all files instead of one exiftool per file
+  list="$(mktemp)" || return 1
+  printf '%s\n' "${files[@]}" >"$list"
+  while IFS=$'\t' read -r f d created; do
+    dates["$f"]="$d"
+    creation_dates["$f"]="$created"
+  done < <(_photo_read_tags "$list" '%m/%d/%Y %H:%M:%S' DateTimeOriginal FileCreateDate)
 
-    d="$(exiftool -s3 -d '%m/%d/%Y %H:%M:%S' -DateTimeOriginal "$f")" || {
+  : >"$list"
+  for f in "${files[@]}"; do
+    if [ -z "${dates["${f#./}"]+set}" ]; then
       echo "exiftool failed for $f" >&2
       ((failed++))
       continue
-    }
+    fi
 
-    [ -z "$d" ] && {
+    d="${dates["${f#./}"]}"
+    [ "$d" = "-" ] && {
       echo "No DateTimeOriginal in EXIF for $f" >&2
       ((failed++))
       continue
     }
 
+    if [ "$d" = "${creation_dates["${f#./}"]}" ]; then
+      echo "Already $d: $f"
+      continue
+    fi
+    printf '%s\t%s\n' "$f" "$d" >>"$list"
+  done
+
+  if [ -s "$list" ]; then
+    _photo_batch_run _fix_date_from_exif_worker "$list"
+    failed=$((failed + _PHOTO_BATCH_FAILED))
+  fi
+  rm -f "$list"
+  _photo_report_throughput "${#files[@]}" "$start"
+
+  [ "$failed" -gt 0 ] && return 1
+}
+
+# _fix_date_from_exif_worker <chunk> — SetFile every "<file>\t<date>" line
+function _fix_date_from_exif_worker() {
+  local f d failed=0
+
+  while IFS=$'\t' read -r f d; do
     if SetFile -d "$d" "$f"; then
       echo "Fixed $f to $d"
     else
       echo "SetFile failed for $f" >&2
       ((failed++))
     fi
-  done
+  done <"$1"
 
-  [ "$failed" -gt 0 ] && return 1
+  echo "$failed" >"$1.failed"
 }
 
 # use exiftool to remove all metadata except copyright information
@@ -51,8 +179,8 @@ function keep_copyright_only() {
     return 1
   fi
 
-  local f glob_pattern files
-  local tmp_args tmp_icc orig_created
+  local f glob_pattern files list start="$EPOCHREALTIME"
+  local -A stripped=()
 
   # Handle glob pattern vs direct files
   if [ $# -eq 1 ] && [[ "$1" == *"*"? ]]; then
@@ -82,82 +210,100 @@ function keep_copyright_only() {
     return 1
   fi
 
-  # Process each file
-  local failed=0
-  for f in "${valid_files[@]}"; do
-    echo "Processing: $f"
-
-    tmp_args="$(mktemp /tmp/metaargsXXXXXX)" || {
-      ((failed++))
-      continue
-    }
-    tmp_icc="$(mktemp /tmp/iccXXXXXX.icc)" || {
-      rm -f "$tmp_args"
-      ((failed++))
-      continue
-    }
+  # One bulk read finds files that were already stripped
+  list="$(mktemp)" || return 1
+  printf '%s\n' "${valid_files[@]}" >"$list"
+  while IFS= read -r f; do
+    stripped["$f"]=1
+  done < <(_keep_copyright_only_clean "$list")
 
-    # 0) Save original creation date (filesystem)
-    if ! orig_created="$(GetFileInfo -d "$f")"; then
-      echo "Warning: Failed to get creation date for '$f', skipping date restoration" >&2
-      rm -f "$tmp_args" "$tmp_icc"
-      ((failed++))
+  : >"$list"
+  for f in "${valid_files[@]}"; do
+    if [ -n "${stripped["${f#./}"]:-}" ]; then
+      echo "✓ Already clean: $f"
       continue
     fi
+    printf '%s\n' "$f" >>"$list"
+  done
+
+  local failed=0
+  if [ -s "$list" ]; then
+    _photo_batch_run _keep_copyright_only_worker "$list"
+    failed="$_PHOTO_BATCH_FAILED"
+  fi
+  rm -f "$list"
+  _photo_report_throughput "${#valid_files[@]}" "$start"
+
+  if [ $failed -gt 0 ]; then
+    echo "Completed with $failed failures out of ${#valid_files[@]} files" >&2
+    return $((failed > 0))
+  fi
+
+  echo "✓ Successfully processed ${#valid_files[@]} files"
+}
+
+# _keep_copyright_only_clean <list> — print the files named in <list> that
+# carry no tags beyond the ones _keep_copyright_only_worker keeps or exiftool
+# adds when it writes them back, the ICC profile, and the File, Composite and
+# ExifTool pseudo-tags. Anything else, including an unreadable file, means the
+# file still has to be stripped. Printed as named in <list>, minus a leading
+# "./". exiftool is Perl, so Perl and JSON::PP are there to read its output.
+function _keep_copyright_only_clean() {
+  exiftool -q -q -m -j -G -a -@ "$1" 2>/dev/null | perl -MJSON::PP -e '
+    my %allowed = map { $_ => 1 } qw(
+      EXIF:DateTimeOriginal EXIF:CreateDate EXIF:ModifyDate EXIF:Copyright
+      XMP:Rights IPTC:CopyrightNotice
+      EXIF:XResolution EXIF:YResolution EXIF:ResolutionUnit EXIF:YCbCrPositioning
+      EXIF:ExifVersion EXIF:ComponentsConfiguration EXIF:FlashpixVersion
+      EXIF:ColorSpace EXIF:ExifImageWidth EXIF:ExifImageHeight
+      EXIF:InteropIndex EXIF:InteropVersion
+      XMP:XMPToolkit IPTC:ApplicationRecordVersion
+    );
+    local $/;
+    my $json = <STDIN>;
+    FILE: for my $file (@{ $json ? decode_json($json) : [] }) {
+      for (keys %$file) {
+        next if $_ eq "SourceFile" || /^(?:File|Composite|ExifTool|ICC_Profile):/;
+        # duplicates listed by -a may carry a copy number after the tag name
+        my ($tag) = /^([^:]+:\w+)/;
+        next FILE unless $tag && $allowed{$tag};
+      }
+      (my $name = $file->{SourceFile}) =~ s{^\./}{};
+      print "$name\n";
+    }'
+}
+
+# _keep_copyright_only_worker <chunk> — strip every file listed in <chunk>
+function _keep_copyright_only_worker() {
+  local f failed=0
 
-    # 1) Export only the tags we want to keep as exiftool args
-    if ! exiftool -args \
+  _photo_exiftool_start
+  while IFS= read -r f; do
+    echo "Processing: $f"
+
+    # Nuke all metadata and copy back the tags we keep, capture date and ICC
+    # profile included, in one pass. Rewriting in place keeps the file's
+    # creation date and other filesystem attributes.
+    if ! _photo_exiftool_write -overwrite_original_in_place \
+      -all= -tagsFromFile @ \
       -DateTimeOriginal \
       -CreateDate \
       -ModifyDate \
       -Copyright \
       -XMP-dc:Rights \
       -IPTC:CopyrightNotice \
-      "$f" >"$tmp_args" 2>/dev/null; then
-      echo "Warning: Failed to extract metadata from '$f'" >&2
-      rm -f "$tmp_args" "$tmp_icc"
-      ((failed++))
-      continue
-    fi
-
-    # 2) Extract ICC profile (if any)
-    exiftool -icc_profile -b "$f" >"$tmp_icc" 2>/dev/null
-
-    # 3) Nuke all metadata
-    if ! exiftool -overwrite_original -all= "$f" >/dev/null 2>&1; then
+      -ICC_Profile \
+      "$f"; then
       echo "Error: Failed to remove metadata from '$f'" >&2
-      rm -f "$tmp_args" "$tmp_icc"
       ((failed++))
       continue
     fi
 
-    # 4) Re-embed ICC profile
-    if [ -s "$tmp_icc" ]; then
-      exiftool -overwrite_original "-ICC_Profile<=$tmp_icc" "$f" >/dev/null 2>&1 ||
-        echo "Warning: Failed to restore ICC profile for '$f'" >&2
-    fi
-
-    # 5) Reapply saved metadata (including capture date)
-    if [ -s "$tmp_args" ]; then
-      exiftool -overwrite_original -@ "$tmp_args" "$f" >/dev/null 2>&1 ||
-        echo "Warning: Failed to restore metadata for '$f'" >&2
-    fi
-
-    # 6) Restore original file creation date (filesystem)
-    if ! SetFile -d "$orig_created" "$f" 2>/dev/null; then
-      echo "Warning: Failed to restore creation date for '$f'" >&2
-    fi
-
-    rm -f "$tmp_args" "$tmp_icc"
     echo "✓ Done: $f"
-  done
+  done <"$1"
+  _photo_exiftool_stop
 
-  if [ $failed -gt 0 ]; then
-    echo "Completed with $failed failures out of ${#valid_files[@]} files" >&2
-    return $((failed > 0))
-  fi
-
-  echo "✓ Successfully processed ${#valid_files[@]} files"
+  echo "$failed" >"$1.failed"
 }
 
 ##############################################################################
@@ -186,6 +332,8 @@ function fix_date_from_name() {
   local files_to_process=()
   local decision_all=""
   local timestamp_regex='[0-9]{8}_[0-9]{6}'
+  local -A exif_datetimes=()
+  local start="$EPOCHREALTIME" list f dto created modified exif_datetime
 
   if ! command -v exiftool &>/dev/null; then
     echo "Error: exiftool is not installed." >&2
@@ -226,13 +374,28 @@ function fix_date_from_name() {
   echo "Found ${#files_to_process[@]} file(s) with timestamp in filename."
   echo ""
 
+  # one bulk read for all files instead of up to three exiftool runs per file
+  list="$(mktemp)" || return 1
+  printf '%s\n' "${files_to_process[@]}" >"$list"
+  while IFS=$'\t' read -r f dto created modified; do
+    for exif_datetime in "$dto" "$created" "$modified" "NOT SET"; do
+      [[ -n "$exif_datetime" && "$exif_datetime" != "-" ]] && break
+    done
+    exif_datetimes["$f"]="$exif_datetime"
+  done < <(_photo_read_tags "$list" "" DateTimeOriginal CreateDate FileModifyDate)
+  rm -f "$list"
+
+  # all updates go through one long-lived exiftool
+  _photo_exiftool_start
   local file_count=0
   for file in "${files_to_process[@]}"; do
     ((file_count++))
     _fix_date_from_name_process_file "$file" "$file_count" "${#files_to_process[@]}"
   done
+  _photo_exiftool_stop
 
   echo ""
+  _photo_report_throughput "${#files_to_process[@]}" "$start"
   echo "✅ Processing complete!"
 }
 
@@ -257,6 +420,13 @@ function _fix_date_from_name_get_exif_datetime() {
   local file="$1"
   local exif_datetime
 
+  # read in bulk by fix_date_from_name
+  if [[ -n "${exif_datetimes["${file#./}"]+set}" ]]; then
+    echo "${exif_datetimes["${file#./}"]}"
+    [[ "${exif_datetimes["${file#./}"]}" != "NOT SET" ]]
+    return
+  fi
+
   exif_datetime=$(exiftool -s -s -s -DateTimeOriginal "$file" 2>/dev/null)
   if [[ -z "$exif_datetime" || "$exif_datetime" == "-" ]]; then
     exif_datetime=$(exiftool -s -s -s -CreateDate "$file" 2>/dev/null)
@@ -317,6 +487,14 @@ function _fix_date_from_name_update_exif() {
   local file="$1"
   local new_datetime="$2"
 
+  if [[ -n "${_PHOTO_EXIFTOOL_PID:-}" ]]; then
+    _photo_exiftool_write -overwrite_original \
+      -DateTimeOriginal="$new_datetime" \
+      -CreateDate="$new_datetime" \
+      "$file"
+    return
+  fi
+
   if exiftool -q -overwrite_original \
     -DateTimeOriginal="$new_datetime" \
     -CreateDate="$new_datetime" \
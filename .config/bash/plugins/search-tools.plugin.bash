@@ -1,11 +1,26 @@
 cite about-plugin
 about-plugin 'advanced tools for searching'
 
+# print the rg command fe and rfv reload on every keystroke. With
+# SEARCH_INDEX_ROOTS set (colon-separated dirs, e.g. the notes vault and
+# ~/git/src), that is search-index's wrapper, which narrows each query to the
+# files its trigram index lists as candidates and runs plain rg outside those
+# roots or while the index is stale. The watcher that keeps the index current
+# is started in the background if it is not running yet.
+function _search_rg () {
+    if [[ -n "${SEARCH_INDEX_ROOTS:-}" ]] && command -v search-index >/dev/null; then
+        (search-index watch --daemon >/dev/null 2>&1 &)
+        echo "search-index rg"
+    else
+        echo "rg"
+    fi
+}
+
 # start interactive ripgrep in fzf and open the selected file in vim
 function fe () {
     FILE_TO_EDIT=$(
     INITIAL_QUERY=""
-    RG_PREFIX="rg --files-with-matches --color=always --smart-case "
+    RG_PREFIX="$(_search_rg) --files-with-matches --color=always --smart-case "
     FZF_DEFAULT_COMMAND="$RG_PREFIX '$INITIAL_QUERY'" \
     fzf --bind "change:reload:$RG_PREFIX {q} || true" \
         --ansi --disabled --query "$INITIAL_QUERY" \
@@ -17,7 +32,7 @@ function fe () {
 
 # search with ripgrep interactively in fzf and open selected files in vim
 function rfv () {
-    RG_PREFIX="rg --column --line-number --no-heading --color=always --smart-case "
+    RG_PREFIX="$(_search_rg) --column --line-number --no-heading --color=always --smart-case "
     INITIAL_QUERY="${*:-}"
     IFS=: read -ra selected < <(
     FZF_DEFAULT_COMMAND="$RG_PREFIX $(printf %q "$INITIAL_QUERY")" \
@@ -0,0 +1,92 @@
+#!/usr/bin/env bash
+# Rescan Mopidy's local library only when the media directory changed.
+#
+# The media directory is a read-only NFS mount, so walking and probing the
+# whole library on every scan is slow. This keeps a manifest of every file's
+# path, size, mtime and inode and runs the scan only when files were added,
+# changed or removed. Mopidy-Local's scan then probes just the files whose
+# mtime differs from its library and drops deleted ones.
+#
+# To avoid stat-ing every file over NFS, the default pass lists directories
+# only and reads files just in directories whose mtime or inode changed
+# (adding, removing or renaming a file touches its directory). A file edited
+# in place, e.g. retagged, does not touch its directory; --deep stats every
+# file to catch those.
+#
+# Usage: mopidy-scan-changes [--deep | --full]
+#   --deep  stat every file instead of only those in changed directories
+#   --full  rescan and rebuild the manifest even if nothing changed
+set -euo pipefail
+
+MEDIA_DIR="${MEDIA_DIR:-/var/local/docker/mopidy/media}"
+STATE_DIR="${STATE_DIR:-/var/local/docker/mopidy/data/scan-manifest}"
+SCAN_COMMAND="${SCAN_COMMAND:-docker exec mopidy /shim/scan-local.sh}"
+
+mode="${1:-quick}"
+case "$mode" in
+quick | --deep | --full) ;;
+*)
+  echo "Usage: mopidy-scan-changes [--deep | --full]" >&2
+  exit 2
+  ;;
+esac
+
+# an unmounted share looks like an empty library; never wipe the manifest
+if ! mountpoint -q "$MEDIA_DIR" && [ -z "$(ls -A "$MEDIA_DIR" 2>/dev/null)" ]; then
+  echo "Media directory $MEDIA_DIR is not mounted, skipping scan" >&2
+  exit 1
+fi
+
+mkdir -p "$STATE_DIR"
+exec 9>"$STATE_DIR/lock"
+flock -n 9 || {
+  echo "Another scan is running, skipping" >&2
+  exit 0
+}
+
+work=$(mktemp -d)
+trap 'rm -rf "$work"' EXIT
+touch "$STATE_DIR/dirs.tsv" "$STATE_DIR/files.tsv"
+cd "$MEDIA_DIR"
+
+# <path>\t<inode>\t<mtime> of every directory
+find . -type d -printf '%P\t%i\t%T@\n' | LC_ALL=C sort >"$work/dirs.tsv"
+
+# <path>\t<size>\t<mtime>\t<inode> of every file
+if [ "$mode" = quick ]; then
+  # keep the old entries of directories that did not change, re-list the rest
+  LC_ALL=C comm -3 "$STATE_DIR/dirs.tsv" "$work/dirs.tsv" | sed 's/^\t//' | cut -f 1 |
+    LC_ALL=C sort -u >"$work/changed-dirs"
+  awk -F '\t' '
+    FILENAME == ARGV[1] { changed[$1] = 1; next }
+    {
+      dir = $1
+      if (!sub(/\/[^\/]*$/, "", dir)) dir = ""
+      if (!(dir in changed)) print
+    }
+  ' "$work/changed-dirs" "$STATE_DIR/files.tsv" >"$work/files.unsorted"
+  while IFS= read -r dir; do
+    [ -d "./$dir" ] || continue
+    find "./$dir" -mindepth 1 -maxdepth 1 -type f -printf '%P\t%s\t%T@\t%i\n' |
+      prefix="${dir:+$dir/}" awk '{ print ENVIRON["prefix"] $0 }'
+  done <"$work/changed-dirs" >>"$work/files.unsorted"
+else
+  find . -type f -printf '%P\t%s\t%T@\t%i\n' >"$work/files.unsorted"
+fi
+LC_ALL=C sort -u "$work/files.unsorted" >"$work/files.tsv"
+
+added=$(LC_ALL=C join -t $'\t' -v 2 <(cut -f 1 "$STATE_DIR/files.tsv") <(cut -f 1 "$work/files.tsv") | wc -l)
+removed=$(LC_ALL=C join -t $'\t' -v 1 <(cut -f 1 "$STATE_DIR/files.tsv") <(cut -f 1 "$work/files.tsv") | wc -l)
+changed=$(($(LC_ALL=C comm -13 "$STATE_DIR/files.tsv" "$work/files.tsv" | wc -l) - added))
+
+echo "$(date '+%Y-%m-%d %H:%M:%S') added $added, changed $changed, removed $removed"
+
+if [ "$mode" != --full ] && [ $((added + changed + removed)) -eq 0 ]; then
+  exit 0
+fi
+
+# commit the manifest only after a successful scan, so a failed one is
+# retried next time
+$SCAN_COMMAND
+mv "$work/dirs.tsv" "$STATE_DIR/dirs.tsv"
+mv "$work/files.tsv" "$STATE_DIR/files.tsv"
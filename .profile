@@ -20,9 +20,18 @@ esac
 # Determine dotfiles root
 export DOTFILES_ROOT=${HOME}
 
-# Use brew
+# Use brew, caching its environment until brew itself is updated
 if [[ $IS_MAC ]]; then
-  eval "$(/opt/homebrew/bin/brew shellenv)"
+  BREW_SHELLENV="${XDG_CACHE_HOME:-$HOME/.cache}/buvis/brew-shellenv.sh"
+  if [[ "${BUVIS_COMPILED_INIT:-1}" == 0 ]]; then
+    eval "$(/opt/homebrew/bin/brew shellenv)"
+  else
+    if [[ ! -s "$BREW_SHELLENV" || /opt/homebrew/bin/brew -nt "$BREW_SHELLENV" ]]; then
+      mkdir -p "${BREW_SHELLENV%/*}" && /opt/homebrew/bin/brew shellenv >"$BREW_SHELLENV"
+    fi
+    source "$BREW_SHELLENV"
+  fi
+  unset BREW_SHELLENV
 fi
 
 # Doogat